@@ -70,6 +70,7 @@ from synapse.storage.databases.main.registration import (
     LoginTokenLookupResult,
     LoginTokenReused,
 )
+from synapse.storage.databases.main.roommember import ProfileInfo
 from synapse.types import JsonDict, Requester, UserID
 from synapse.util import stringutils as stringutils
 from synapse.util.async_helpers import delay_cancellation, maybe_awaitable
@@ -1758,7 +1759,7 @@ class AuthHandler:
 
         user_profile_data = await self.store.get_profileinfo(
             UserID.from_string(registered_user_id).localpart
-        )
+        ) or ProfileInfo(None, None)
 
         # Store any extra attributes which will be passed in the login response.
         # Note that this is per-user so it may overwrite a previous value, this
@@ -18,6 +18,7 @@ from typing import TYPE_CHECKING, Optional
 from synapse.api.errors import SynapseError
 from synapse.handlers.device import DeviceHandler
 from synapse.metrics.background_process_metrics import run_as_background_process
+from synapse.storage.databases.main.roommember import ProfileInfo
 from synapse.types import Codes, Requester, UserID, create_requester
 
 if TYPE_CHECKING:
@@ -297,5 +298,7 @@ class DeactivateAccountHandler:
         # Add the user to the directory, if necessary. Note that
         # this must be done after the user is re-activated, because
         # deactivated users are excluded from the user directory.
-        profile = await self.store.get_profileinfo(user.localpart)
+        profile = await self.store.get_profileinfo(user.localpart) or ProfileInfo(
+            None, None
+        )
         await self.user_directory_handler.handle_local_profile_change(user_id, profile)
@@ -23,6 +23,7 @@ from synapse.api.errors import (
     StoreError,
     SynapseError,
 )
+from synapse.storage.databases.main.roommember import ProfileInfo
 from synapse.types import JsonDict, Requester, UserID, create_requester
 from synapse.util.caches.descriptors import cached
 from synapse.util.stringutils import parse_and_validate_mxc_uri
@@ -68,7 +69,7 @@ class ProfileHandler:
 
         if self.hs.is_mine(target_user):
             profileinfo = await self.store.get_profileinfo(target_user.localpart)
-            if profileinfo.display_name is None:
+            if profileinfo is None or profileinfo.display_name is None:
                 raise SynapseError(404, "Profile was not found", Codes.NOT_FOUND)
 
             return {
@@ -148,7 +149,7 @@ class ProfileHandler:
 
         if not by_admin and not self.hs.config.registration.enable_set_displayname:
             profile = await self.store.get_profileinfo(target_user.localpart)
-            if profile.display_name:
+            if profile and profile.display_name:
                 raise SynapseError(
                     400,
                     "Changing display name is disabled on this server",
@@ -180,7 +181,9 @@ class ProfileHandler:
 
         await self.store.set_profile_displayname(target_user, displayname_to_set)
 
-        profile = await self.store.get_profileinfo(target_user.localpart)
+        profile = await self.store.get_profileinfo(
+            target_user.localpart
+        ) or ProfileInfo(None, None)
         await self.user_directory_handler.handle_local_profile_change(
             target_user.to_string(), profile
         )
@@ -201,6 +204,7 @@ class ProfileHandler:
                 if e.code == 404:
                     raise SynapseError(404, "Profile was not found", Codes.NOT_FOUND)
                 raise
+
             return avatar_url
         else:
             try:
@@ -242,7 +246,7 @@ class ProfileHandler:
 
         if not by_admin and not self.hs.config.registration.enable_set_avatar_url:
             profile = await self.store.get_profileinfo(target_user.localpart)
-            if profile.avatar_url:
+            if profile and profile.avatar_url:
                 raise SynapseError(
                     400, "Changing avatar is disabled on this server", Codes.FORBIDDEN
                 )
@@ -272,7 +276,9 @@ class ProfileHandler:
 
         await self.store.set_profile_avatar_url(target_user, avatar_url_to_set)
 
-        profile = await self.store.get_profileinfo(target_user.localpart)
+        profile = await self.store.get_profileinfo(
+            target_user.localpart
+        ) or ProfileInfo(None, None)
         await self.user_directory_handler.handle_local_profile_change(
             target_user.to_string(), profile
         )
@@ -46,6 +46,7 @@ from synapse.replication.http.register import (
     ReplicationRegisterServlet,
 )
 from synapse.spam_checker_api import RegistrationBehaviour
+from synapse.storage.databases.main.roommember import ProfileInfo
 from synapse.types import GUEST_USER_ID_PATTERN, RoomAlias, UserID, create_requester
 from synapse.types.state import StateFilter
 
@@ -315,7 +316,9 @@ class RegistrationHandler:
                 approved=approved,
             )
 
-            profile = await self.store.get_profileinfo(localpart)
+            profile = await self.store.get_profileinfo(localpart) or ProfileInfo(
+                None, None
+            )
             await self.user_directory_handler.handle_local_profile_change(
                 user_id, profile
             )
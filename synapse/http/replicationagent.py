@@ -13,14 +13,14 @@
 # limitations under the License.
 
 import logging
-from typing import Optional
+from typing import Optional, Tuple, Union
 
+import attr
 from zope.interface import implementer
 
 from twisted.internet import defer
 from twisted.internet.endpoints import HostnameEndpoint, wrapClientTLS
 from twisted.internet.interfaces import IStreamClientEndpoint
-from twisted.python.failure import Failure
 from twisted.web.client import URI, HTTPConnectionPool, _AgentBase
 from twisted.web.error import SchemeNotSupported
 from twisted.web.http_headers import Headers
@@ -33,9 +33,106 @@ from twisted.web.iweb import (
 )
 
 from synapse.types import ISynapseReactor
+from synapse.util.caches.lrucache import LruCache
 
 logger = logging.getLogger(__name__)
 
+# Kill switch for the lightweight URI class below: flip to False to have
+# `_parse_uri` construct a full `twisted.web.client.URI` instead.
+FAST_URI = True
+
+
+@attr.s(slots=True, frozen=True, auto_attribs=True)
+class _FastURI:
+    """A lightweight stand-in for `twisted.web.client.URI`.
+
+    `URI` carries eight attributes and is built via a regex; this class only
+    carries what `_AgentBase` and `ReplicationEndpointFactory` actually read,
+    which makes it noticeably cheaper to allocate on a URI-cache miss.
+    """
+
+    scheme: bytes
+    netloc: bytes
+    host: bytes
+    port: int
+    path: bytes
+    query: bytes
+    # Unlike URI.originForm this is a plain attribute, computed once at parse
+    # time rather than on every access.
+    originForm: bytes
+
+    def toBytes(self) -> bytes:
+        uri = self.scheme + b"://" + self.netloc + self.path
+        if self.query:
+            uri += b"?" + self.query
+        return uri
+
+
+_ParsedURI = Union[URI, _FastURI]
+
+
+def _parse_uri(uri: bytes) -> _ParsedURI:
+    """Parse a replication URI, avoiding the regex in `URI.fromBytes`.
+
+    Synapse generates its replication URIs itself, so in practice they have a
+    rigidly predictable `http(s)://host(:port)/path(?query)` shape, which can
+    be split apart much more cheaply than a general RFC 3986 parse. Anything
+    that doesn't match that shape is handed to `URI.fromBytes`.
+    """
+    if not FAST_URI:
+        return URI.fromBytes(uri)
+
+    scheme, sep, rest = uri.partition(b"://")
+    if not sep or (scheme != b"http" and scheme != b"https"):
+        return URI.fromBytes(uri)
+
+    netloc, sep, path = rest.partition(b"/")
+    if sep:
+        path = b"/" + path
+
+    if b"?" in netloc or b"#" in netloc:
+        # A query or fragment with no path, e.g. `http://host?q=1`; not a
+        # shape Synapse produces, so let Twisted split the netloc.
+        return URI.fromBytes(uri)
+
+    if b"#" in path or b";" in path:
+        # Fragments and path parameters are not produced by Synapse; let
+        # Twisted deal with them.
+        return URI.fromBytes(uri)
+
+    path, _, query = path.partition(b"?")
+
+    if netloc.startswith(b"["):
+        # IPv6 literals need bracket-aware netloc splitting.
+        return URI.fromBytes(uri)
+
+    host, sep, port_bytes = netloc.rpartition(b":")
+    if sep:
+        try:
+            port = int(port_bytes)
+        except ValueError:
+            return URI.fromBytes(uri)
+    else:
+        host = netloc
+        port = 443 if scheme == b"https" else 80
+
+    # Matches URI.originForm: the path plus any query string, never empty.
+    origin_form = path
+    if query:
+        origin_form += b"?" + query
+    if not origin_form:
+        origin_form = b"/"
+
+    return _FastURI(
+        scheme=scheme,
+        netloc=netloc,
+        host=host,
+        port=port,
+        path=path,
+        query=query,
+        originForm=origin_form,
+    )
+
 
 @implementer(IAgentEndpointFactory)
 class ReplicationEndpointFactory:
@@ -49,7 +146,14 @@ class ReplicationEndpointFactory:
         self.reactor = reactor
         self.context_factory = context_factory
 
-    def endpointForURI(self, uri: URI) -> IStreamClientEndpoint:
+        # Endpoints don't hold any per-connection state, so they can be reused
+        # for a given (scheme, host, port). Rebuilding them is not free: for
+        # HTTPS, creatorForNetloc constructs a fresh SSL context every call.
+        self._endpoint_cache: LruCache[
+            Tuple[bytes, bytes, int], IStreamClientEndpoint
+        ] = LruCache(max_size=256)
+
+    def endpointForURI(self, uri: "_ParsedURI") -> IStreamClientEndpoint:
         """
         This part of the factory decides what kind of endpoint is being connected to.
 
@@ -59,12 +163,21 @@ class ReplicationEndpointFactory:
         Returns: The correct client endpoint object
         """
         if uri.scheme in (b"http", b"https"):
-            endpoint = HostnameEndpoint(self.reactor, uri.host, uri.port)
+            key = (uri.scheme, uri.host, uri.port)
+            cached_endpoint = self._endpoint_cache.get(key)
+            if cached_endpoint is not None:
+                return cached_endpoint
+
+            new_endpoint: IStreamClientEndpoint = HostnameEndpoint(
+                self.reactor, uri.host, uri.port
+            )
             if uri.scheme == b"https":
-                endpoint = wrapClientTLS(
-                    self.context_factory.creatorForNetloc(uri.host, uri.port), endpoint
+                new_endpoint = wrapClientTLS(
+                    self.context_factory.creatorForNetloc(uri.host, uri.port),
+                    new_endpoint,
                 )
-            return endpoint
+            self._endpoint_cache[key] = new_endpoint
+            return new_endpoint
         else:
             raise SchemeNotSupported(f"Unsupported scheme: {uri.scheme!r}")
 
@@ -98,9 +211,18 @@ class ReplicationAgent(_AgentBase):
                 for the peer to accept a connection.
             bindAddress: The local address for client sockets to bind to.
             pool: An HTTPConnectionPool instance, or None, in which
-                case a non-persistent HTTPConnectionPool instance will be
+                case a persistent HTTPConnectionPool instance will be
                 created.
         """
+        if pool is None:
+            # Replication traffic goes to a small, fixed set of workers over
+            # and over: keep connections alive rather than paying a TCP (and
+            # possibly TLS) handshake per burst of requests. The pool key is
+            # (scheme, netloc), so connections are already coalesced per
+            # host:port. These values match those used by ReplicationClient.
+            pool = HTTPConnectionPool(reactor, persistent=True)
+            pool.maxPersistentPerHost = 5
+            pool.cachedConnectionTimeout = 2 * 60
         _AgentBase.__init__(self, reactor, pool)
         endpoint_factory = ReplicationEndpointFactory(reactor, contextFactory)
         self._endpointFactory = endpoint_factory
@@ -128,11 +250,20 @@ class ReplicationAgent(_AgentBase):
 
         See: twisted.web.iweb.IAgent.request
         """
-        parsedURI = URI.fromBytes(uri)
-        try:
-            endpoint = self._endpointFactory.endpointForURI(parsedURI)
-        except SchemeNotSupported:
-            return defer.fail(Failure())
+        if not (uri.startswith(b"http://") or uri.startswith(b"https://")):
+            # Check the scheme up front so the happy path below doesn't
+            # need a try/except around endpointForURI.
+            # defer.fail wraps a plain exception in a Failure without
+            # capturing a traceback, which is all the caller needs.
+            scheme = uri.split(b":", 1)[0]
+            return defer.fail(SchemeNotSupported(f"Unsupported scheme: {scheme!r}"))
+
+        # Note that a per-URI cache would be useless here: most replication
+        # requests embed a random transaction ID in the path, so the full URI
+        # is almost never seen twice. Endpoint reuse is instead handled by the
+        # (scheme, host, port) cache in ReplicationEndpointFactory.
+        parsedURI = _parse_uri(uri)
+        endpoint = self._endpointFactory.endpointForURI(parsedURI)
 
         # This sets the Pool key to be:
         #  (http(s), <host:ip>)
@@ -646,9 +646,10 @@ class ModuleApi:
             localpart: The localpart to look up profile information for.
 
         Returns:
-            The profile information (i.e. display name and avatar URL).
+            The profile information (i.e. display name and avatar URL). If the
+            user has no profile, a `ProfileInfo` with both attributes None.
         """
-        return await self._store.get_profileinfo(localpart)
+        return await self._store.get_profileinfo(localpart) or ProfileInfo(None, None)
 
     async def get_threepids_for_user(self, user_id: str) -> List[Dict[str, str]]:
         """Look up the threepids (email addresses and phone numbers) associated with the
@@ -13,11 +13,22 @@
 # limitations under the License.
 
 import abc
+import copy
 import logging
 import re
 import urllib.parse
 from inspect import signature
-from typing import TYPE_CHECKING, Any, Awaitable, Callable, ClassVar, Dict, List, Tuple
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    ClassVar,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
 
 from prometheus_client import Counter, Gauge
 
@@ -206,6 +217,15 @@ class ReplicationEndpoint(metaclass=abc.ABCMeta):
 
         outgoing_gauge = _pending_outgoing_requests.labels(cls.NAME)
 
+        # GET requests are idempotent reads, so concurrent identical requests
+        # can be coalesced onto a single HTTP call rather than each costing a
+        # round trip. The default timeout_ms=0 means the entry is dropped as
+        # soon as the request completes: this deduplicates in-flight requests
+        # without caching their results.
+        coalesced_gets: Optional[ResponseCache[str]] = None
+        if cls.METHOD == "GET":
+            coalesced_gets = ResponseCache(hs.get_clock(), "repl_coalesce." + cls.NAME)
+
         replication_secret = None
         if hs.config.worker.worker_replication_secret:
             replication_secret = hs.config.worker.worker_replication_secret.encode(
@@ -257,6 +277,9 @@ class ReplicationEndpoint(metaclass=abc.ABCMeta):
                 url_args = [
                     urllib.parse.quote(kwargs[name], safe="") for name in cls.PATH_ARGS
                 ]
+                # Kept without the random txn_id appended below: the
+                # coalescing key must be identical for identical requests.
+                stable_url_args = list(url_args)
 
                 if cls.CACHE:
                     txn_id = random_string(10)
@@ -294,67 +317,88 @@ class ReplicationEndpoint(metaclass=abc.ABCMeta):
                     headers[b"Authorization"] = [b"Bearer " + replication_secret]
                 opentracing.inject_header_dict(headers, check_destination=False)
 
-                try:
-                    # Keep track of attempts made so we can bail if we don't manage to
-                    # connect to the target after N tries.
-                    attempts = 0
-                    # We keep retrying the same request for timeouts. This is so that we
-                    # have a good idea that the request has either succeeded or failed
-                    # on the master, and so whether we should clean up or not.
-                    while True:
-                        try:
-                            result = await request_func(uri, data, headers=headers)
-                            break
-                        except RequestTimedOutError:
-                            if not cls.RETRY_ON_TIMEOUT:
-                                raise
-
-                            logger.warning("%s request timed out; retrying", cls.NAME)
-
-                            # If we timed out we probably don't need to worry about backing
-                            # off too much, but lets just wait a little anyway.
-                            await clock.sleep(1)
-                        except (ConnectError, DNSLookupError) as e:
-                            if not cls.RETRY_ON_CONNECT_ERROR:
-                                raise
-                            if attempts > cls.RETRY_ON_CONNECT_ERROR_ATTEMPTS:
-                                raise
-
-                            delay = 2**attempts
-                            logger.warning(
-                                "%s request connection failed; retrying in %ds: %r",
-                                cls.NAME,
-                                delay,
-                                e,
-                            )
-
-                            await clock.sleep(delay)
-                            attempts += 1
-                except HttpResponseException as e:
-                    # We convert to SynapseError as we know that it was a SynapseError
-                    # on the main process that we should send to the client. (And
-                    # importantly, not stack traces everywhere)
-                    _outgoing_request_counter.labels(cls.NAME, e.code).inc()
-                    raise e.to_synapse_error()
-                except Exception as e:
-                    _outgoing_request_counter.labels(cls.NAME, "ERR").inc()
-                    raise SynapseError(
-                        502, f"Failed to talk to {instance_name} process"
-                    ) from e
-
-                _outgoing_request_counter.labels(cls.NAME, 200).inc()
-
-                # Wait on any streams that the remote may have written to.
-                for stream_name, position in result.pop(
-                    _STREAM_POSITION_KEY, {}
-                ).items():
-                    await replication.wait_for_stream_position(
-                        instance_name=instance_name,
-                        stream_name=stream_name,
-                        position=position,
+                async def _send() -> Any:
+                    try:
+                        # Keep track of attempts made so we can bail if we don't manage to
+                        # connect to the target after N tries.
+                        attempts = 0
+                        # We keep retrying the same request for timeouts. This is so that we
+                        # have a good idea that the request has either succeeded or failed
+                        # on the master, and so whether we should clean up or not.
+                        while True:
+                            try:
+                                result = await request_func(uri, data, headers=headers)
+                                break
+                            except RequestTimedOutError:
+                                if not cls.RETRY_ON_TIMEOUT:
+                                    raise
+
+                                logger.warning(
+                                    "%s request timed out; retrying", cls.NAME
+                                )
+
+                                # If we timed out we probably don't need to worry about backing
+                                # off too much, but lets just wait a little anyway.
+                                await clock.sleep(1)
+                            except (ConnectError, DNSLookupError) as e:
+                                if not cls.RETRY_ON_CONNECT_ERROR:
+                                    raise
+                                if attempts > cls.RETRY_ON_CONNECT_ERROR_ATTEMPTS:
+                                    raise
+
+                                delay = 2**attempts
+                                logger.warning(
+                                    "%s request connection failed; retrying in %ds: %r",
+                                    cls.NAME,
+                                    delay,
+                                    e,
+                                )
+
+                                await clock.sleep(delay)
+                                attempts += 1
+                    except HttpResponseException as e:
+                        # We convert to SynapseError as we know that it was a SynapseError
+                        # on the main process that we should send to the client. (And
+                        # importantly, not stack traces everywhere)
+                        _outgoing_request_counter.labels(cls.NAME, e.code).inc()
+                        raise e.to_synapse_error()
+                    except Exception as e:
+                        _outgoing_request_counter.labels(cls.NAME, "ERR").inc()
+                        raise SynapseError(
+                            502, f"Failed to talk to {instance_name} process"
+                        ) from e
+
+                    _outgoing_request_counter.labels(cls.NAME, 200).inc()
+
+                    # Wait on any streams that the remote may have written to.
+                    for stream_name, position in result.pop(
+                        _STREAM_POSITION_KEY, {}
+                    ).items():
+                        await replication.wait_for_stream_position(
+                            instance_name=instance_name,
+                            stream_name=stream_name,
+                            position=position,
+                        )
+
+                    return result
+
+                if coalesced_gets is not None:
+                    # The URI is no use as a key: endpoints with CACHE set
+                    # embed a random txn_id in the path, making every URI
+                    # unique. Key on the stable parts of the request instead.
+                    coalesce_key = "%s/%s/%s?%s" % (
+                        instance_name,
+                        cls.NAME,
+                        "/".join(stable_url_args),
+                        urllib.parse.urlencode(data, doseq=True),
                     )
+                    result = await coalesced_gets.wrap(coalesce_key, _send)
+                    # Callers awaiting the same in-flight request would
+                    # otherwise share one result object; give each caller its
+                    # own copy so mutating the response stays safe.
+                    return copy.deepcopy(result)
 
-                return result
+                return await _send()
 
         return send_request
 
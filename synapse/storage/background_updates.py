@@ -520,6 +520,7 @@ class BackgroundUpdater:
         unique: bool = False,
         psql_only: bool = False,
         replaces_index: Optional[str] = None,
+        include_columns: Optional[Iterable[str]] = None,
     ) -> None:
         """Helper for store classes to do a background index addition
 
@@ -542,6 +543,11 @@ class BackgroundUpdater:
                 for virtual sqlite tables)
             replaces_index: The name of an index that this index replaces.
                 The named index will be dropped upon completion of the new index.
+            include_columns: columns to add to the index as non-key columns,
+                making it a covering index. On SQLite, which has no INCLUDE
+                clause, the columns are appended to the key columns instead;
+                because that would widen a UNIQUE constraint, combining this
+                with `unique` is not supported.
         """
 
         async def updater(progress: JsonDict, batch_size: int) -> int:
@@ -553,6 +559,7 @@ class BackgroundUpdater:
                 unique=unique,
                 psql_only=psql_only,
                 replaces_index=replaces_index,
+                include_columns=include_columns,
             )
             await self._end_background_update(update_name)
             return 1
@@ -614,6 +621,7 @@ class BackgroundUpdater:
         unique: bool = False,
         psql_only: bool = False,
         replaces_index: Optional[str] = None,
+        include_columns: Optional[Iterable[str]] = None,
     ) -> None:
         """Add an index in the background.
 
@@ -628,7 +636,18 @@ class BackgroundUpdater:
                 for virtual sqlite tables)
             replaces_index: The name of an index that this index replaces.
                 The named index will be dropped upon completion of the new index.
+            include_columns: columns to add to the index as non-key columns,
+                making it a covering index. On SQLite, which has no INCLUDE
+                clause, the columns are appended to the key columns instead;
+                because that would widen a UNIQUE constraint, combining this
+                with `unique` is not supported.
         """
+        # On SQLite the include columns become key columns, which would change
+        # the meaning of a unique index; refuse the combination rather than
+        # create indexes with different semantics on the two engines.
+        assert not (
+            unique and include_columns
+        ), "include_columns is not supported on unique indexes"
 
         def create_index_psql(conn: Connection) -> None:
             conn.rollback()
@@ -649,12 +668,15 @@ class BackgroundUpdater:
                 sql = (
                     "CREATE %(unique)s INDEX CONCURRENTLY %(name)s"
                     " ON %(table)s"
-                    " (%(columns)s) %(where_clause)s"
+                    " (%(columns)s) %(include)s %(where_clause)s"
                 ) % {
                     "unique": "UNIQUE" if unique else "",
                     "name": index_name,
                     "table": table,
                     "columns": ", ".join(columns),
+                    "include": "INCLUDE (%s)" % (", ".join(include_columns),)
+                    if include_columns
+                    else "",
                     "where_clause": "WHERE " + where_clause if where_clause else "",
                 }
                 logger.debug("[SQL] %s", sql)
@@ -683,7 +705,11 @@ class BackgroundUpdater:
                 "unique": "UNIQUE" if unique else "",
                 "name": index_name,
                 "table": table,
-                "columns": ", ".join(columns),
+                "columns": ", ".join(
+                    list(columns) + list(include_columns)
+                    if include_columns
+                    else columns
+                ),
                 "where_clause": "WHERE " + where_clause if where_clause else "",
             }
 
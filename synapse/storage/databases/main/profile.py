@@ -11,19 +11,35 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Collection, Dict, Mapping, Optional, Tuple, cast
 
 from synapse.api.errors import StoreError
-from synapse.storage._base import SQLBaseStore
-from synapse.storage.database import DatabasePool, LoggingDatabaseConnection
+from synapse.storage.database import (
+    DatabasePool,
+    LoggingDatabaseConnection,
+    LoggingTransaction,
+)
+from synapse.storage.databases.main.cache import CacheInvalidationWorkerStore
 from synapse.storage.databases.main.roommember import ProfileInfo
-from synapse.types import UserID
+from synapse.types import JsonDict, UserID
+from synapse.util.caches.descriptors import cached, cachedList
 
 if TYPE_CHECKING:
     from synapse.server import HomeServer
 
+# Sentinel for profile fields which the caller did not ask to change.
+_UNSET: Any = object()
 
-class ProfileWorkerStore(SQLBaseStore):
+# Shared so every execution presents byte-identical SQL to the driver. Only
+# the stdlib sqlite3 module benefits from that (it keeps a per-connection
+# statement cache keyed on the query text); psycopg2 does no statement caching
+# at all, and we rewrite the string for its paramstyle anyway. The hot-path
+# win of using raw SQL here is fetching a plain tuple instead of going through
+# the dict machinery of `simple_select_one`.
+_SQL_GET_PROFILEINFO = "SELECT displayname, avatar_url FROM profiles WHERE user_id = ?"
+
+
+class ProfileWorkerStore(CacheInvalidationWorkerStore):
     def __init__(
         self,
         database: DatabasePool,
@@ -31,6 +47,9 @@ class ProfileWorkerStore(SQLBaseStore):
         hs: "HomeServer",
     ):
         super().__init__(database, db_conn, hs)
+
+        self.server_name: str = hs.hostname
+
         self.db_pool.updates.register_background_index_update(
             "profiles_full_user_id_key_idx",
             index_name="profiles_full_user_id_key",
@@ -39,48 +58,238 @@ class ProfileWorkerStore(SQLBaseStore):
             unique=True,
         )
 
-    async def get_profileinfo(self, user_localpart: str) -> ProfileInfo:
-        try:
-            profile = await self.db_pool.simple_select_one(
-                table="profiles",
-                keyvalues={"user_id": user_localpart},
-                retcols=("displayname", "avatar_url"),
-                desc="get_profileinfo",
-            )
-        except StoreError as e:
-            if e.code == 404:
-                # no match
-                return ProfileInfo(None, None)
+        # A covering index, so that the profile getters can be answered with
+        # an index-only scan instead of also fetching the heap tuple.
+        self.db_pool.updates.register_background_index_update(
+            "profiles_user_id_covering_idx",
+            index_name="profiles_user_id_covering",
+            table="profiles",
+            columns=["user_id"],
+            include_columns=["displayname", "avatar_url"],
+        )
+
+        self.db_pool.updates.register_background_update_handler(
+            "populate_full_user_id_profiles", self.populate_full_user_id_profiles
+        )
+
+    async def populate_full_user_id_profiles(
+        self, progress: JsonDict, batch_size: int
+    ) -> int:
+        """
+        Background update to populate the column `full_user_id` of the table
+        profiles from entries in the column `user_id` of the same table
+        """
+
+        lower_bound_id = progress.get("lower_bound_id", "")
+
+        def _get_last_id(txn: LoggingTransaction) -> Optional[str]:
+            sql = """
+                    SELECT user_id FROM profiles
+                    WHERE user_id > ?
+                    ORDER BY user_id
+                    LIMIT 1 OFFSET 1000
+                  """
+            txn.execute(sql, (lower_bound_id,))
+            res = txn.fetchone()
+            if res:
+                upper_bound_id = res[0]
+                return upper_bound_id
             else:
-                raise
+                return None
+
+        def _process_batch(
+            txn: LoggingTransaction, lower_bound_id: str, upper_bound_id: str
+        ) -> None:
+            sql = """
+                    UPDATE profiles
+                    SET full_user_id = '@' || user_id || ?
+                    WHERE ? < user_id AND user_id <= ? AND full_user_id IS NULL
+                   """
+            txn.execute(sql, (f":{self.server_name}", lower_bound_id, upper_bound_id))
+
+        def _final_batch(txn: LoggingTransaction, lower_bound_id: str) -> None:
+            sql = """
+                    UPDATE profiles
+                    SET full_user_id = '@' || user_id || ?
+                    WHERE ? < user_id AND full_user_id IS NULL
+                   """
+            txn.execute(sql, (f":{self.server_name}", lower_bound_id))
 
-        return ProfileInfo(
-            avatar_url=profile["avatar_url"], display_name=profile["displayname"]
+        upper_bound_id = await self.db_pool.runInteraction(
+            "populate_full_user_id_profiles", _get_last_id
         )
 
-    async def get_profile_displayname(self, user_localpart: str) -> Optional[str]:
-        return await self.db_pool.simple_select_one_onecol(
-            table="profiles",
-            keyvalues={"user_id": user_localpart},
-            retcol="displayname",
-            desc="get_profile_displayname",
+        if upper_bound_id is None:
+            await self.db_pool.runInteraction(
+                "populate_full_user_id_profiles", _final_batch, lower_bound_id
+            )
+
+            await self.db_pool.updates._end_background_update(
+                "populate_full_user_id_profiles"
+            )
+            return 1
+
+        await self.db_pool.runInteraction(
+            "populate_full_user_id_profiles",
+            _process_batch,
+            lower_bound_id,
+            upper_bound_id,
         )
 
-    async def get_profile_avatar_url(self, user_localpart: str) -> Optional[str]:
-        return await self.db_pool.simple_select_one_onecol(
+        await self.db_pool.updates._background_update_progress(
+            "populate_full_user_id_profiles", {"lower_bound_id": upper_bound_id}
+        )
+
+        return 1000
+
+    @cached(max_entries=10000)
+    async def get_profileinfo(self, user_localpart: str) -> Optional[ProfileInfo]:
+        """Fetch a user's profile.
+
+        Returns:
+            The profile, or None if the user has no profile row at all. (A
+            user with a profile row but neither field set gets a `ProfileInfo`
+            with both attributes None; callers which care about the Matrix
+            404-for-missing-users semantics must distinguish the two.)
+        """
+
+        def get_profileinfo_txn(
+            txn: LoggingTransaction,
+        ) -> Optional[Tuple[Optional[str], Optional[str]]]:
+            # Fetch the row as a tuple rather than going through
+            # simple_select_one, which builds a dict per call: this is a
+            # per-event-render hot path.
+            txn.execute(_SQL_GET_PROFILEINFO, (user_localpart,))
+            return cast(Optional[Tuple[Optional[str], Optional[str]]], txn.fetchone())
+
+        row = await self.db_pool.runInteraction("get_profileinfo", get_profileinfo_txn)
+        if row is None:
+            # no match
+            return None
+
+        displayname, avatar_url = row
+        return ProfileInfo(avatar_url=avatar_url, display_name=displayname)
+
+    @cachedList(cached_method_name="get_profileinfo", list_name="user_localparts")
+    async def get_profileinfos(
+        self, user_localparts: Collection[str]
+    ) -> Mapping[str, Optional[ProfileInfo]]:
+        """Fetch the profiles of several local users in one query.
+
+        Users already in the `get_profileinfo` cache are served from it, and
+        results fetched here are added to it.
+
+        Args:
+            user_localparts: The localparts of the users to look up.
+
+        Returns:
+            A map from user localpart to their profile. Users with no profile
+            row are mapped to None, matching `get_profileinfo`.
+        """
+        rows = await self.db_pool.simple_select_many_batch(
             table="profiles",
-            keyvalues={"user_id": user_localpart},
-            retcol="avatar_url",
-            desc="get_profile_avatar_url",
+            column="user_id",
+            iterable=user_localparts,
+            retcols=("user_id", "displayname", "avatar_url"),
+            keyvalues={},
+            desc="get_profileinfos",
         )
 
+        return {
+            row["user_id"]: ProfileInfo(
+                avatar_url=row["avatar_url"], display_name=row["displayname"]
+            )
+            for row in rows
+        }
+
+    async def get_profile_displayname(self, user_localpart: str) -> Optional[str]:
+        """Fetch a user's display name.
+
+        Served from `get_profileinfo`'s cache: nearly every caller of this
+        method asks for the avatar moments later, so sharing the cache beats
+        a dedicated single-column query.
+
+        Raises:
+            StoreError(404): if the user has no profile row.
+        """
+        profile = await self.get_profileinfo(user_localpart)
+        if profile is None:
+            raise StoreError(404, "No row found")
+        return profile.display_name
+
+    async def get_profile_avatar_url(self, user_localpart: str) -> Optional[str]:
+        """Fetch a user's avatar URL.
+
+        See `get_profile_displayname`.
+
+        Raises:
+            StoreError(404): if the user has no profile row.
+        """
+        profile = await self.get_profileinfo(user_localpart)
+        if profile is None:
+            raise StoreError(404, "No row found")
+        return profile.avatar_url
+
     async def create_profile(self, user_id: UserID) -> None:
         user_localpart = user_id.localpart
-        await self.db_pool.simple_insert(
-            table="profiles",
-            values={"user_id": user_localpart, "full_user_id": user_id.to_string()},
-            desc="create_profile",
-        )
+        full_user_id = user_id.to_string()
+
+        def create_profile_txn(txn: LoggingTransaction) -> None:
+            self.db_pool.simple_insert_txn(
+                txn,
+                table="profiles",
+                values={"user_id": user_localpart, "full_user_id": full_user_id},
+            )
+            self._invalidate_profile_caches(txn, user_localpart)
+
+        await self.db_pool.runInteraction("create_profile", create_profile_txn)
+
+    async def set_profile(
+        self,
+        user_id: UserID,
+        *,
+        displayname: Optional[str] = _UNSET,
+        avatar_url: Optional[str] = _UNSET,
+    ) -> None:
+        """
+        Set one or more fields of a user's profile in a single upsert.
+
+        Callers updating both the display name and the avatar should use this
+        rather than the single-field setters, so that only one transaction is
+        issued.
+
+        Args:
+            user_id: The user's ID.
+            displayname: The new display name. If this is None, the user's
+                display name is removed; if unspecified, it is left unchanged.
+            avatar_url: The new avatar URL. If this is None, the user's avatar
+                is removed; if unspecified, it is left unchanged.
+        """
+        values: Dict[str, Any] = {}
+        if displayname is not _UNSET:
+            values["displayname"] = displayname
+        if avatar_url is not _UNSET:
+            values["avatar_url"] = avatar_url
+        if not values:
+            return
+
+        user_localpart = user_id.localpart
+        full_user_id = user_id.to_string()
+
+        def set_profile_txn(txn: LoggingTransaction) -> None:
+            # `full_user_id` is immutable for a given `user_id`, so only write
+            # it when inserting a new row: rewriting it on every update churns
+            # the unique index on `full_user_id` for no benefit.
+            self.db_pool.simple_upsert_txn(
+                txn,
+                table="profiles",
+                keyvalues={"user_id": user_localpart},
+                values=values,
+                insertion_values={"full_user_id": full_user_id},
+            )
+            self._invalidate_profile_caches(txn, user_localpart)
+
+        await self.db_pool.runInteraction("set_profile", set_profile_txn)
 
     async def set_profile_displayname(
         self, user_id: UserID, new_displayname: Optional[str]
@@ -93,16 +302,7 @@ class ProfileWorkerStore(SQLBaseStore):
             new_displayname: The new display name. If this is None, the user's display
                 name is removed.
         """
-        user_localpart = user_id.localpart
-        await self.db_pool.simple_upsert(
-            table="profiles",
-            keyvalues={"user_id": user_localpart},
-            values={
-                "displayname": new_displayname,
-                "full_user_id": user_id.to_string(),
-            },
-            desc="set_profile_displayname",
-        )
+        await self.set_profile(user_id, displayname=new_displayname)
 
     async def set_profile_avatar_url(
         self, user_id: UserID, new_avatar_url: Optional[str]
@@ -115,13 +315,13 @@ class ProfileWorkerStore(SQLBaseStore):
             new_avatar_url: The new avatar URL. If this is None, the user's avatar is
                 removed.
         """
-        user_localpart = user_id.localpart
-        await self.db_pool.simple_upsert(
-            table="profiles",
-            keyvalues={"user_id": user_localpart},
-            values={"avatar_url": new_avatar_url, "full_user_id": user_id.to_string()},
-            desc="set_profile_avatar_url",
-        )
+        await self.set_profile(user_id, avatar_url=new_avatar_url)
+
+    def _invalidate_profile_caches(
+        self, txn: LoggingTransaction, user_localpart: str
+    ) -> None:
+        """Invalidate the profile caches for a user, here and on other workers."""
+        self._invalidate_cache_and_stream(txn, self.get_profileinfo, (user_localpart,))
 
 
 class ProfileStore(ProfileWorkerStore):
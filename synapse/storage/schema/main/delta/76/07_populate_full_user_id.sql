@@ -0,0 +1,19 @@
+/* Copyright 2023 The Matrix.org Foundation C.I.C
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+-- Backfill `full_user_id` for rows which predate the column: new writes only
+-- populate it on insert, so pre-existing rows stay NULL until these run.
+INSERT INTO background_updates (ordering, update_name, progress_json) VALUES (7607, 'populate_full_user_id_profiles', '{}');
+INSERT INTO background_updates (ordering, update_name, progress_json) VALUES (7607, 'populate_full_user_id_user_filters', '{}');
@@ -72,6 +72,11 @@ class ProfileTestCase(unittest.HomeserverTestCase):
 
         self.assertEqual("Frank", displayname)
 
+    def test_get_my_name_missing_profile(self) -> None:
+        """A profile query for a user with no profile row returns a 404."""
+        f = self.get_failure(self.handler.get_displayname(self.bob), SynapseError)
+        self.assertEqual(f.value.code, 404)
+
     def test_set_my_name(self) -> None:
         self.get_success(
             self.handler.set_displayname(
@@ -183,6 +188,21 @@ class ProfileTestCase(unittest.HomeserverTestCase):
 
         self.assertEqual({"displayname": "Caroline"}, response)
 
+    def test_incoming_fed_query_missing_profile(self) -> None:
+        """A federation profile query for a user with no profile row returns
+        a 404."""
+        f = self.get_failure(
+            self.query_handlers["profile"](
+                {
+                    "user_id": "@4567:test",
+                    "field": "displayname",
+                    "origin": "servername.tld",
+                }
+            ),
+            SynapseError,
+        )
+        self.assertEqual(f.value.code, 404)
+
     def test_get_my_avatar(self) -> None:
         self.get_success(
             self.store.set_profile_avatar_url(self.frank, "http://my.server/me.png")
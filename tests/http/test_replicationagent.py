@@ -0,0 +1,54 @@
+# Copyright 2023 The Matrix.org Foundation C.I.C.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from twisted.web.client import URI
+
+from synapse.http.replicationagent import _parse_uri
+
+from tests import unittest
+
+
+class ParseUriTestCase(unittest.TestCase):
+    def test_parse_uri_matches_twisted(self) -> None:
+        """The fast parser must agree with `URI.fromBytes` for every shape of
+        URI it may be given, including those it punts back to Twisted."""
+        test_data = [
+            b"http://host:9000/_synapse/replication/fed_send_events/123",
+            b"https://host:9000/_synapse/replication/presence_set_state?u=1",
+            b"http://host/_synapse/replication/x",
+            b"https://host",
+            b"http://host:8008",
+            b"http://[::1]:8008/path",
+            b"http://host:9000/path#frag",
+            b"ftp://host/x",
+            b"http://host:9000/a;b/c",
+            b"http://host?q=1",
+            b"http://host:9000#frag",
+        ]
+
+        for uri in test_data:
+            expected = URI.fromBytes(uri)
+            actual = _parse_uri(uri)
+            for field in (
+                "scheme",
+                "netloc",
+                "host",
+                "port",
+                "path",
+                "query",
+                "originForm",
+            ):
+                self.assertEqual(
+                    getattr(actual, field), getattr(expected, field), repr(uri)
+                )
+            self.assertEqual(actual.toBytes(), expected.toBytes(), repr(uri))
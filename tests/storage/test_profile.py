@@ -47,6 +47,72 @@ class ProfileStoreTestCase(unittest.HomeserverTestCase):
             self.get_success(self.store.get_profile_displayname(self.u_frank.localpart))
         )
 
+    def test_populate_full_user_id_profiles(self) -> None:
+        """Test the background update that copies entries from the `user_id`
+        column to `full_user_id`, adding the hostname in the process.
+        """
+        # Insert some rows predating the `full_user_id` column, enough to span
+        # more than one batch of the update.
+        self.get_success(
+            self.store.db_pool.simple_insert_many(
+                "profiles",
+                keys=("user_id",),
+                values=[(f"user{i:04}",) for i in range(1500)],
+                desc="insert_profiles",
+            )
+        )
+
+        self.get_success(
+            self.store.db_pool.simple_insert(
+                "background_updates",
+                values={
+                    "update_name": "populate_full_user_id_profiles",
+                    "progress_json": "{}",
+                },
+            )
+        )
+        self.store.db_pool.updates._all_done = False
+        self.wait_for_background_updates()
+
+        rows = self.get_success(
+            self.store.db_pool.simple_select_list(
+                table="profiles",
+                keyvalues={},
+                retcols=("user_id", "full_user_id"),
+                desc="get_profiles",
+            )
+        )
+        self.assertEqual(len(rows), 1500)
+        for row in rows:
+            self.assertEqual(row["full_user_id"], f"@{row['user_id']}:test")
+
+    def test_profile_created_after_lookup(self) -> None:
+        # Looking up a missing profile caches the miss...
+        self.assertIsNone(
+            self.get_success(self.store.get_profileinfo(self.u_frank.localpart))
+        )
+
+        # ...but creating the profile must invalidate the cached entry.
+        self.get_success(self.store.create_profile(self.u_frank))
+        self.get_success(self.store.set_profile_displayname(self.u_frank, "Frank"))
+
+        profile = self.get_success(self.store.get_profileinfo(self.u_frank.localpart))
+        assert profile is not None
+        self.assertEqual("Frank", profile.display_name)
+
+    def test_profileinfos(self) -> None:
+        self.get_success(self.store.create_profile(self.u_frank))
+        self.get_success(self.store.set_profile_displayname(self.u_frank, "Frank"))
+
+        profiles = self.get_success(
+            self.store.get_profileinfos([self.u_frank.localpart, "nonexistent"])
+        )
+
+        frank_profile = profiles[self.u_frank.localpart]
+        assert frank_profile is not None
+        self.assertEqual("Frank", frank_profile.display_name)
+        self.assertIsNone(profiles["nonexistent"])
+
     def test_avatar_url(self) -> None:
         self.get_success(self.store.create_profile(self.u_frank))
 
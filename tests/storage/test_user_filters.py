@@ -0,0 +1,63 @@
+# Copyright 2023 The Matrix.org Foundation C.I.C.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from twisted.test.proto_helpers import MemoryReactor
+
+from synapse.server import HomeServer
+from synapse.util import Clock
+
+from tests import unittest
+
+
+class UserFiltersStoreTestCase(unittest.HomeserverTestCase):
+    def prepare(self, reactor: MemoryReactor, clock: Clock, hs: HomeServer) -> None:
+        self.store = hs.get_datastores().main
+
+    def test_populate_full_user_id_user_filters(self) -> None:
+        """Test the background update that copies entries from the `user_id`
+        column to `full_user_id`, adding the hostname in the process.
+        """
+        # Insert some rows predating the `full_user_id` column, enough to span
+        # more than one batch of the update.
+        self.get_success(
+            self.store.db_pool.simple_insert_many(
+                "user_filters",
+                keys=("user_id", "filter_id", "filter_json"),
+                values=[(f"user{i:04}", 0, bytearray(b"{}")) for i in range(1500)],
+                desc="insert_user_filters",
+            )
+        )
+
+        self.get_success(
+            self.store.db_pool.simple_insert(
+                "background_updates",
+                values={
+                    "update_name": "populate_full_user_id_user_filters",
+                    "progress_json": "{}",
+                },
+            )
+        )
+        self.store.db_pool.updates._all_done = False
+        self.wait_for_background_updates()
+
+        rows = self.get_success(
+            self.store.db_pool.simple_select_list(
+                table="user_filters",
+                keyvalues={},
+                retcols=("user_id", "full_user_id"),
+                desc="get_user_filters",
+            )
+        )
+        self.assertEqual(len(rows), 1500)
+        for row in rows:
+            self.assertEqual(row["full_user_id"], f"@{row['user_id']}:test")